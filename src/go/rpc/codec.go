@@ -0,0 +1,141 @@
+package server
+
+import (
+	"bytes"
+	"encoding/json"
+	"reflect"
+	"time"
+
+	"github.com/gorilla/websocket"
+	"github.com/ugorji/go/codec"
+)
+
+// msgpackSubprotocol is offered by clients that want MessagePack binary frames
+// instead of JSON text. Clients that do not offer it keep getting JSON.
+const msgpackSubprotocol = "jsonrpc-msgpack"
+
+// msgpackTimeExt is the extension type carrying time.Time as the same RFC 3339
+// string JSON clients get
+const msgpackTimeExt = 1
+
+var msgpackHandle = newMsgpackHandle()
+
+func newMsgpackHandle() *codec.MsgpackHandle {
+	h := &codec.MsgpackHandle{}
+	h.WriteExt = true    // Use the str/bin types of the current MessagePack spec
+	h.RawToString = true // Decode strings as string, not []byte
+	h.MapType = reflect.TypeOf(map[string]interface{}(nil))
+	h.TypeInfos = codec.NewTypeInfos([]string{"json"}) // Same field names and omitempty as encoding/json
+	h.TimeNotBuiltin = true
+	if err := h.SetBytesExt(reflect.TypeOf(time.Time{}), msgpackTimeExt, timeExt{}); err != nil {
+		panic(err)
+	}
+	return h
+}
+
+// timeExt encodes time.Time as RFC 3339 text instead of the MessagePack timestamp type
+type timeExt struct{}
+
+func (timeExt) WriteExt(v interface{}) []byte {
+	switch t := v.(type) {
+	case time.Time:
+		return []byte(t.Format(time.RFC3339Nano))
+	case *time.Time:
+		return []byte(t.Format(time.RFC3339Nano))
+	}
+	return nil
+}
+
+func (timeExt) ReadExt(dst interface{}, src []byte) {
+	if t, err := time.Parse(time.RFC3339Nano, string(src)); err == nil {
+		*dst.(*time.Time) = t
+	}
+}
+
+// msgpackRequest is the MessagePack form of RPCRequest. Params stay encoded
+// until the method decodes them into its own params struct.
+type msgpackRequest struct {
+	JSONRPC string      `json:"jsonrpc"`
+	ID      interface{} `json:"id,omitempty"`
+	Method  string      `json:"method"`
+	Params  codec.Raw   `json:"params,omitempty"`
+}
+
+func (r *msgpackRequest) request() RPCRequest {
+	return RPCRequest{JSONRPC: r.JSONRPC, ID: r.ID, Method: r.Method, Params: json.RawMessage(r.Params), msgpack: true}
+}
+
+// isMsgpack reports whether the client negotiated MessagePack frames
+func isMsgpack(conn *websocket.Conn) bool {
+	return conn.Subprotocol() == msgpackSubprotocol
+}
+
+// isBatch reports whether a request frame holds a batch array
+func isBatch(conn *websocket.Conn, msg []byte) bool {
+	if isMsgpack(conn) {
+		return len(msg) > 0 && (msg[0]&0xf0 == 0x90 || msg[0] == 0xdc || msg[0] == 0xdd)
+	}
+	msg = bytes.TrimLeft(msg, " \t\r\n")
+	return len(msg) > 0 && msg[0] == '['
+}
+
+// decodeRequest decodes a single request frame in the connection's format
+func decodeRequest(conn *websocket.Conn, msg []byte, req *RPCRequest) error {
+	if !isMsgpack(conn) {
+		return json.Unmarshal(msg, req)
+	}
+	var r msgpackRequest
+	if err := codec.NewDecoderBytes(msg, msgpackHandle).Decode(&r); err != nil {
+		return err
+	}
+	*req = r.request()
+	return nil
+}
+
+// decodeBatch decodes a batch request frame in the connection's format
+func decodeBatch(conn *websocket.Conn, msg []byte) ([]RPCRequest, error) {
+	var reqs []RPCRequest
+	if !isMsgpack(conn) {
+		err := json.Unmarshal(msg, &reqs)
+		return reqs, err
+	}
+	var rs []msgpackRequest
+	if err := codec.NewDecoderBytes(msg, msgpackHandle).Decode(&rs); err != nil {
+		return nil, err
+	}
+	reqs = make([]RPCRequest, len(rs))
+	for i := range rs {
+		reqs[i] = rs[i].request()
+	}
+	return reqs, nil
+}
+
+// decodeParams decodes the request params into v, in the format the request arrived in
+func (r *RPCRequest) decodeParams(v interface{}) error {
+	if r.msgpack {
+		return codec.NewDecoderBytes(r.Params, msgpackHandle).Decode(v)
+	}
+	return json.Unmarshal(r.Params, v)
+}
+
+// marshal encodes v as JSON, or as MessagePack when the client negotiated it
+func marshal(conn *websocket.Conn, v interface{}) ([]byte, error) {
+	if !isMsgpack(conn) {
+		return json.Marshal(v)
+	}
+	var b []byte
+	err := codec.NewEncoderBytes(&b, msgpackHandle).Encode(v)
+	return b, err
+}
+
+// writeMessage sends v as a JSON text frame, or as a MessagePack binary frame when negotiated
+func writeMessage(conn *websocket.Conn, v interface{}) error {
+	if !isMsgpack(conn) {
+		return conn.WriteJSON(v)
+	}
+	b, err := marshal(conn, v)
+	if err != nil {
+		return err
+	}
+	return conn.WriteMessage(websocket.BinaryMessage, b)
+}
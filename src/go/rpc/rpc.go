@@ -16,6 +16,15 @@ type RPCRequest struct {
 	ID      interface{}     `json:"id,omitempty"`
 	Method  string          `json:"method"`
 	Params  json.RawMessage `json:"params,omitempty"`
+	msgpack bool            // Params are MessagePack, see decodeParams
+}
+
+// RPCNotification is a server to client notification. Params are encoded
+// directly in the connection's format.
+type RPCNotification struct {
+	JSONRPC string      `json:"jsonrpc"`
+	Method  string      `json:"method"`
+	Params  interface{} `json:"params,omitempty"`
 }
 
 type RPCResponse struct {
@@ -23,6 +32,7 @@ type RPCResponse struct {
 	ID      interface{} `json:"id,omitempty"`
 	Result  interface{} `json:"result,omitempty"`
 	Error   *RPCError   `json:"error,omitempty"`
+	Binary  []byte      `json:"-"` // Raw body sent as a binary frame after the response header
 }
 
 type RPCError struct {
@@ -97,7 +107,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 
 	case "send":
 		var msgReq whatsapp.MessageRequest
-		if err := json.Unmarshal(req.Params, &msgReq); err != nil {
+		if err := req.decodeParams(&msgReq); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if err := h.service.SendEnhancedMessage(&msgReq); err != nil {
 			resp.Error = &RPCError{Code: -32000, Message: err.Error()}
@@ -108,11 +118,19 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 	case "media":
 		var p struct {
 			MessageID string `json:"message_id"`
+			Binary    bool   `json:"binary"` // Optional: send raw bytes in a binary frame instead of base64
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if data, mime, err := h.service.DownloadMedia(p.MessageID); err != nil {
 			resp.Error = &RPCError{Code: -32000, Message: err.Error()}
+		} else if p.Binary {
+			resp.Result = map[string]interface{}{
+				"mime_type":  mime,
+				"message_id": p.MessageID,
+				"size":       len(data),
+			}
+			resp.Binary = data
 		} else {
 			resp.Result = map[string]interface{}{
 				"data":      data,
@@ -124,7 +142,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 		var p struct {
 			Refresh bool `json:"refresh"` // Optional: force refresh from WhatsApp API
 		}
-		json.Unmarshal(req.Params, &p) // Ignore error, defaults to false
+		req.decodeParams(&p) // Ignore error, defaults to false
 		if groups, err := h.service.GetGroups(p.Refresh); err != nil {
 			resp.Error = &RPCError{Code: -32000, Message: err.Error()}
 		} else {
@@ -136,7 +154,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 			GroupID string `json:"group_id"`
 			Refresh bool   `json:"refresh"` // Optional: force refresh from WhatsApp API
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if p.GroupID == "" {
 			resp.Error = &RPCError{Code: -32602, Message: "group_id is required"}
@@ -148,7 +166,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 
 	case "group_update":
 		var p whatsapp.GroupUpdateRequest
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if p.GroupID == "" {
 			resp.Error = &RPCError{Code: -32602, Message: "group_id is required"}
@@ -165,7 +183,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 			Phones  []string `json:"phones"`
 			Refresh bool     `json:"refresh"` // Optional: force refresh from WhatsApp API
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if len(p.Phones) == 0 {
 			resp.Error = &RPCError{Code: -32602, Message: "phones array is required and must not be empty"}
@@ -181,7 +199,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 			Preview bool   `json:"preview"`
 			Refresh bool   `json:"refresh"` // Optional: force refresh from WhatsApp API
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if p.JID == "" {
 			resp.Error = &RPCError{Code: -32602, Message: "jid is required"}
@@ -195,7 +213,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 		var p struct {
 			Query string `json:"query"`
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			// If params parsing fails, use empty query (list all)
 			p.Query = ""
 		}
@@ -212,7 +230,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 		var p struct {
 			Phone string `json:"phone"`
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if p.Phone == "" {
 			resp.Error = &RPCError{Code: -32602, Message: "phone is required"}
@@ -228,7 +246,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 			State string `json:"state"`
 			Media string `json:"media"`
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if p.JID == "" {
 			resp.Error = &RPCError{Code: -32602, Message: "jid is required"}
@@ -244,7 +262,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 		var p struct {
 			Status string `json:"status"`
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if p.Status == "" {
 			resp.Error = &RPCError{Code: -32602, Message: "status is required ('available' or 'unavailable')"}
@@ -260,7 +278,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 			ChatJID    string   `json:"chat_jid"`
 			SenderJID  string   `json:"sender_jid"`
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if len(p.MessageIDs) == 0 {
 			resp.Error = &RPCError{Code: -32602, Message: "message_ids array is required"}
@@ -277,7 +295,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 			GroupID      string   `json:"group_id"`
 			Participants []string `json:"participants"`
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if p.GroupID == "" {
 			resp.Error = &RPCError{Code: -32602, Message: "group_id is required"}
@@ -294,7 +312,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 			GroupID      string   `json:"group_id"`
 			Participants []string `json:"participants"`
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if p.GroupID == "" {
 			resp.Error = &RPCError{Code: -32602, Message: "group_id is required"}
@@ -311,7 +329,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 			GroupID string `json:"group_id"`
 			Refresh bool   `json:"refresh"` // Optional: force refresh from WhatsApp API
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if p.GroupID == "" {
 			resp.Error = &RPCError{Code: -32602, Message: "group_id is required"}
@@ -325,7 +343,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 		var p struct {
 			GroupID string `json:"group_id"`
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if p.GroupID == "" {
 			resp.Error = &RPCError{Code: -32602, Message: "group_id is required"}
@@ -345,7 +363,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 			SenderPhone string `json:"sender_phone"`
 			TextOnly    bool   `json:"text_only"`
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else {
 			// Resolve chat_id from phone or group_id if not directly provided
@@ -385,7 +403,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 
 	case "rate_limit_set":
 		var config whatsapp.RateLimitConfig
-		if err := json.Unmarshal(req.Params, &config); err != nil {
+		if err := req.decodeParams(&config); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if err := h.service.SetRateLimitConfig(&config); err != nil {
 			resp.Error = &RPCError{Code: -32000, Message: err.Error()}
@@ -412,7 +430,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 		var p struct {
 			Refresh bool `json:"refresh"`
 		}
-		json.Unmarshal(req.Params, &p)
+		req.decodeParams(&p)
 		if newsletters, err := h.service.GetNewsletters(p.Refresh); err != nil {
 			resp.Error = &RPCError{Code: -32000, Message: err.Error()}
 		} else {
@@ -425,7 +443,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 			Invite  string `json:"invite"`
 			Refresh bool   `json:"refresh"`
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else {
 			jidOrInvite := p.JID
@@ -443,7 +461,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 
 	case "newsletter_create":
 		var p whatsapp.CreateNewsletterRequest
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if p.Name == "" {
 			resp.Error = &RPCError{Code: -32602, Message: "name is required"}
@@ -457,7 +475,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 		var p struct {
 			JID string `json:"jid"`
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if p.JID == "" {
 			resp.Error = &RPCError{Code: -32602, Message: "jid is required"}
@@ -471,7 +489,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 		var p struct {
 			JID string `json:"jid"`
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if p.JID == "" {
 			resp.Error = &RPCError{Code: -32602, Message: "jid is required"}
@@ -486,7 +504,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 			JID  string `json:"jid"`
 			Mute bool   `json:"mute"`
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if p.JID == "" {
 			resp.Error = &RPCError{Code: -32602, Message: "jid is required"}
@@ -498,7 +516,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 
 	case "newsletter_messages":
 		var query whatsapp.NewsletterMessageQuery
-		if err := json.Unmarshal(req.Params, &query); err != nil {
+		if err := req.decodeParams(&query); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if query.JID == "" {
 			resp.Error = &RPCError{Code: -32602, Message: "jid is required"}
@@ -510,7 +528,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 
 	case "newsletter_send":
 		var msgReq whatsapp.MessageRequest
-		if err := json.Unmarshal(req.Params, &msgReq); err != nil {
+		if err := req.decodeParams(&msgReq); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if msgReq.GroupID == "" {
 			resp.Error = &RPCError{Code: -32602, Message: "group_id (newsletter JID) is required"}
@@ -525,7 +543,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 			JID       string `json:"jid"`
 			ServerIDs []int  `json:"server_ids"`
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if p.JID == "" {
 			resp.Error = &RPCError{Code: -32602, Message: "jid is required"}
@@ -543,7 +561,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 			ServerID int    `json:"server_id"`
 			Reaction string `json:"reaction"`
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if p.JID == "" {
 			resp.Error = &RPCError{Code: -32602, Message: "jid is required"}
@@ -559,7 +577,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 		var p struct {
 			JID string `json:"jid"`
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else if p.JID == "" {
 			resp.Error = &RPCError{Code: -32602, Message: "jid is required"}
@@ -575,7 +593,7 @@ func (h *RPCHandler) HandleRequest(req *RPCRequest) RPCResponse {
 			Invite string `json:"invite"`
 			Count  int    `json:"count"`
 		}
-		if err := json.Unmarshal(req.Params, &p); err != nil {
+		if err := req.decodeParams(&p); err != nil {
 			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
 		} else {
 			jidOrInvite := p.JID
@@ -609,13 +627,13 @@ func (h *RPCHandler) ForwardEvents(conn *websocket.Conn, mu *sync.Mutex, done ch
 			if !ok {
 				return
 			}
-			notif := RPCRequest{
+			notif := RPCNotification{
 				JSONRPC: "2.0",
 				Method:  "event." + event.Type,
-				Params:  mustMarshal(event.Data),
+				Params:  event.Data,
 			}
 			mu.Lock()
-			if err := conn.WriteJSON(notif); err != nil {
+			if err := writeMessage(conn, notif); err != nil {
 				mu.Unlock()
 				h.logger.Errorf("Failed to send event: %v", err)
 				return
@@ -624,8 +642,3 @@ func (h *RPCHandler) ForwardEvents(conn *websocket.Conn, mu *sync.Mutex, done ch
 		}
 	}
 }
-
-func mustMarshal(v interface{}) json.RawMessage {
-	b, _ := json.Marshal(v)
-	return b
-}
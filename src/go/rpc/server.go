@@ -1,6 +1,7 @@
 package server
 
 import (
+	"encoding/binary"
 	"net/http"
 	"sync"
 
@@ -29,6 +30,7 @@ func New(whatsappService *whatsapp.Service, logger *logrus.Logger) *Server {
 			},
 			ReadBufferSize:  1024 * 1024,       // 1 MB read buffer
 			WriteBufferSize: 100 * 1024 * 1024, // 100 MB write buffer for large media
+			Subprotocols:    []string{msgpackSubprotocol},
 		},
 	}
 }
@@ -83,30 +85,131 @@ func (s *Server) handleWebSocketRPC(c *gin.Context) {
 	// Send initial status
 	status := s.whatsapp.GetStatus()
 	writeMu.Lock()
-	conn.WriteJSON(RPCRequest{
+	writeMessage(conn, RPCNotification{
 		JSONRPC: "2.0",
 		Method:  "event.status",
-		Params:  mustMarshal(status),
+		Params:  status,
 	})
 	writeMu.Unlock()
 
-	// Read and handle incoming requests
+	s.serveRequests(conn, &writeMu, handler)
+	close(done)
+}
+
+// requestHandler answers a single decoded request, RPCHandler in production
+type requestHandler interface {
+	HandleRequest(req *RPCRequest) RPCResponse
+}
+
+// serveRequests reads and answers requests (single or batch) until the client disconnects
+func (s *Server) serveRequests(conn *websocket.Conn, mu *sync.Mutex, handler requestHandler) {
 	for {
-		var req RPCRequest
-		if err := conn.ReadJSON(&req); err != nil {
+		_, msg, err := conn.ReadMessage()
+		if err != nil {
 			s.logger.Debugf("RPC client disconnected: %v", err)
-			close(done)
 			return
 		}
 
+		if isBatch(conn, msg) {
+			s.handleBatch(conn, mu, handler, msg)
+			continue
+		}
+
+		var req RPCRequest
+		if err := decodeRequest(conn, msg, &req); err != nil {
+			s.logger.Debugf("Invalid RPC request: %v", err)
+			mu.Lock()
+			writeMessage(conn, RPCResponse{JSONRPC: "2.0", Error: &RPCError{Code: -32700, Message: "Parse error: " + err.Error()}})
+			mu.Unlock()
+			continue
+		}
+
 		s.logger.Debugf("RPC request: %s", req.Method)
 
 		// Process request and send response
 		resp := handler.HandleRequest(&req)
-		if req.ID != nil {
-			writeMu.Lock()
-			conn.WriteJSON(resp)
-			writeMu.Unlock()
+		if req.ID == nil {
+			s.logNotificationError(&req, &resp)
+			continue
+		}
+		mu.Lock()
+		s.writeResponse(conn, &resp)
+		mu.Unlock()
+	}
+}
+
+// logNotificationError logs a failed notification, which has no response to carry the error
+func (s *Server) logNotificationError(req *RPCRequest, resp *RPCResponse) {
+	if resp.Error != nil {
+		s.logger.Warnf("RPC notification %s failed: %s", req.Method, resp.Error.Message)
+	}
+}
+
+// handleBatch processes a JSON-RPC 2.0 batch and replies with a single array of responses
+func (s *Server) handleBatch(conn *websocket.Conn, mu *sync.Mutex, handler requestHandler, msg []byte) {
+	reqs, err := decodeBatch(conn, msg)
+	if err != nil || len(reqs) == 0 {
+		mu.Lock()
+		writeMessage(conn, RPCResponse{JSONRPC: "2.0", Error: &RPCError{Code: -32600, Message: "Invalid batch request"}})
+		mu.Unlock()
+		return
+	}
+
+	s.logger.Debugf("RPC batch: %d requests", len(reqs))
+
+	responses := make([]RPCResponse, 0, len(reqs))
+	for i := range reqs {
+		resp := handler.HandleRequest(&reqs[i])
+		if reqs[i].ID == nil {
+			s.logNotificationError(&reqs[i], &resp)
+			continue
+		}
+		if resp.Binary != nil {
+			// Raw bodies cannot be embedded in the response array, send them on their own frame
+			mu.Lock()
+			s.writeResponse(conn, &resp)
+			mu.Unlock()
+			continue
+		}
+		responses = append(responses, resp)
+	}
+
+	if len(responses) > 0 {
+		mu.Lock()
+		writeMessage(conn, responses)
+		mu.Unlock()
+	}
+}
+
+// writeResponse sends a response as a single message, or as a binary frame when it carries a raw body
+func (s *Server) writeResponse(conn *websocket.Conn, resp *RPCResponse) {
+	if resp.Binary != nil {
+		if err := writeBinaryResponse(conn, resp); err != nil {
+			s.logger.Errorf("Failed to send binary response: %v", err)
 		}
+		return
+	}
+	if err := writeMessage(conn, resp); err != nil {
+		s.logger.Errorf("Failed to send response: %v", err)
+	}
+}
+
+// writeBinaryResponse sends a response as a single binary frame:
+// [4-byte big-endian header length][JSON-RPC response header][raw body]
+// The header is JSON, or MessagePack when the client negotiated it.
+func writeBinaryResponse(conn *websocket.Conn, resp *RPCResponse) error {
+	header, err := marshal(conn, resp)
+	if err != nil {
+		return err
+	}
+	w, err := conn.NextWriter(websocket.BinaryMessage)
+	if err != nil {
+		return err
 	}
+	var size [4]byte
+	binary.BigEndian.PutUint32(size[:], uint32(len(header)))
+	w.Write(size[:])
+	w.Write(header)
+	w.Write(resp.Binary)
+	return w.Close()
 }
@@ -0,0 +1,239 @@
+package server
+
+import (
+	"encoding/binary"
+	"encoding/json"
+	"fmt"
+	"io"
+	"net/http"
+	"net/http/httptest"
+	"strings"
+	"sync"
+	"testing"
+	"time"
+
+	"github.com/gorilla/websocket"
+	"github.com/sirupsen/logrus"
+	"github.com/ugorji/go/codec"
+)
+
+var (
+	testTime  = time.Date(2026, 1, 2, 3, 4, 5, 6, time.UTC)
+	testMedia = []byte{0x89, 'P', 'N', 'G', 0, 1, 2, 3}
+)
+
+var encodings = []struct {
+	name         string
+	subprotocols []string
+}{
+	{"json", nil},
+	{"msgpack", []string{msgpackSubprotocol}},
+}
+
+// handlerFunc adapts a function to requestHandler
+type handlerFunc func(req *RPCRequest) RPCResponse
+
+func (f handlerFunc) HandleRequest(req *RPCRequest) RPCResponse {
+	return f(req)
+}
+
+// testHandler echoes its params with a timestamp, and serves media as a raw body
+func testHandler(req *RPCRequest) RPCResponse {
+	resp := RPCResponse{JSONRPC: "2.0", ID: req.ID}
+	switch req.Method {
+	case "echo":
+		var p struct {
+			Text  string `json:"text"`
+			Count int    `json:"count"`
+		}
+		if err := req.decodeParams(&p); err != nil {
+			resp.Error = &RPCError{Code: -32602, Message: "Invalid params: " + err.Error()}
+		} else {
+			resp.Result = map[string]interface{}{"text": p.Text, "count": p.Count, "timestamp": testTime}
+		}
+	case "media":
+		resp.Result = map[string]interface{}{"mime_type": "image/png", "size": len(testMedia)}
+		resp.Binary = testMedia
+	default:
+		resp.Error = &RPCError{Code: -32601, Message: "Method not found: " + req.Method}
+	}
+	return resp
+}
+
+type testResponse struct {
+	ID     int                    `json:"id"`
+	Result map[string]interface{} `json:"result"`
+	Error  *RPCError              `json:"error"`
+}
+
+// dial starts a server answering with testHandler and connects to it
+func dial(t *testing.T, subprotocols []string) *websocket.Conn {
+	t.Helper()
+	logger := logrus.New()
+	logger.SetOutput(io.Discard)
+	s := New(nil, logger)
+	// Same subprotocols as the production upgrader, without its 100 MB write buffer
+	upgrader := websocket.Upgrader{Subprotocols: s.upgrader.Subprotocols}
+	srv := httptest.NewServer(http.HandlerFunc(func(w http.ResponseWriter, r *http.Request) {
+		conn, err := upgrader.Upgrade(w, r, nil)
+		if err != nil {
+			return
+		}
+		defer conn.Close()
+		var mu sync.Mutex
+		s.serveRequests(conn, &mu, handlerFunc(testHandler))
+	}))
+	t.Cleanup(srv.Close)
+
+	dialer := websocket.Dialer{Subprotocols: subprotocols}
+	conn, _, err := dialer.Dial("ws"+strings.TrimPrefix(srv.URL, "http"), nil)
+	if err != nil {
+		t.Fatalf("dial: %v", err)
+	}
+	t.Cleanup(func() { conn.Close() })
+	if isMsgpack(conn) != (len(subprotocols) > 0) {
+		t.Fatalf("negotiated subprotocol %q, offered %v", conn.Subprotocol(), subprotocols)
+	}
+	return conn
+}
+
+// receive reads one message into v and returns the raw body of a binary response, if any
+func receive(t *testing.T, conn *websocket.Conn, v interface{}) []byte {
+	t.Helper()
+	msgType, msg, err := conn.ReadMessage()
+	if err != nil {
+		t.Fatalf("read: %v", err)
+	}
+
+	var body []byte
+	if msgType == websocket.BinaryMessage && len(msg) > 4 && msg[0] == 0 {
+		// [4-byte header length][header][raw body]
+		n := binary.BigEndian.Uint32(msg[:4])
+		msg, body = msg[4:4+n], msg[4+n:]
+	} else if isMsgpack(conn) && msgType != websocket.BinaryMessage {
+		t.Fatalf("got frame type %d, want binary", msgType)
+	} else if !isMsgpack(conn) && msgType != websocket.TextMessage {
+		t.Fatalf("got frame type %d, want text", msgType)
+	}
+
+	if isMsgpack(conn) {
+		err = codec.NewDecoderBytes(msg, msgpackHandle).Decode(v)
+	} else {
+		err = json.Unmarshal(msg, v)
+	}
+	if err != nil {
+		t.Fatalf("decode %x: %v", msg, err)
+	}
+	return body
+}
+
+func checkEcho(t *testing.T, resp testResponse, id int, text string) {
+	t.Helper()
+	if resp.ID != id || resp.Error != nil {
+		t.Fatalf("got id %d error %v, want id %d", resp.ID, resp.Error, id)
+	}
+	if resp.Result["text"] != text || fmt.Sprint(resp.Result["count"]) != "3" {
+		t.Errorf("got result %v, want text %q count 3", resp.Result, text)
+	}
+	// JSON clients get an RFC 3339 string, MessagePack clients the same string in a time extension
+	switch ts := resp.Result["timestamp"].(type) {
+	case string:
+		if ts != testTime.Format(time.RFC3339Nano) {
+			t.Errorf("got timestamp %q, want %q", ts, testTime.Format(time.RFC3339Nano))
+		}
+	case time.Time:
+		if !ts.Equal(testTime) {
+			t.Errorf("got timestamp %v, want %v", ts, testTime)
+		}
+	default:
+		t.Errorf("got timestamp %#v, want %v", ts, testTime)
+	}
+}
+
+func echo(id int, text string) map[string]interface{} {
+	return map[string]interface{}{
+		"jsonrpc": "2.0",
+		"id":      id,
+		"method":  "echo",
+		"params":  map[string]interface{}{"text": text, "count": 3},
+	}
+}
+
+func TestSingleResponse(t *testing.T) {
+	for _, enc := range encodings {
+		t.Run(enc.name, func(t *testing.T) {
+			conn := dial(t, enc.subprotocols)
+			if err := writeMessage(conn, echo(7, "hello")); err != nil {
+				t.Fatalf("write: %v", err)
+			}
+			var resp testResponse
+			if body := receive(t, conn, &resp); body != nil {
+				t.Fatalf("got raw body %x, want none", body)
+			}
+			checkEcho(t, resp, 7, "hello")
+		})
+	}
+}
+
+func TestBatchResponse(t *testing.T) {
+	for _, enc := range encodings {
+		t.Run(enc.name, func(t *testing.T) {
+			conn := dial(t, enc.subprotocols)
+			notification := map[string]interface{}{"jsonrpc": "2.0", "method": "echo"}
+			unknown := map[string]interface{}{"jsonrpc": "2.0", "id": 3, "method": "nope"}
+			batch := []interface{}{echo(1, "a"), notification, echo(2, "b"), unknown}
+			if err := writeMessage(conn, batch); err != nil {
+				t.Fatalf("write: %v", err)
+			}
+
+			var resps []testResponse
+			receive(t, conn, &resps)
+			if len(resps) != 3 {
+				t.Fatalf("got %d responses, want 3 (notifications get none)", len(resps))
+			}
+			checkEcho(t, resps[0], 1, "a")
+			checkEcho(t, resps[1], 2, "b")
+			if resps[2].ID != 3 || resps[2].Error == nil || resps[2].Error.Code != -32601 {
+				t.Errorf("got %+v, want method not found for id 3", resps[2])
+			}
+		})
+	}
+}
+
+func TestBinaryMediaResponse(t *testing.T) {
+	for _, enc := range encodings {
+		t.Run(enc.name, func(t *testing.T) {
+			conn := dial(t, enc.subprotocols)
+			media := map[string]interface{}{"jsonrpc": "2.0", "id": 5, "method": "media"}
+			if err := writeMessage(conn, media); err != nil {
+				t.Fatalf("write: %v", err)
+			}
+			var resp testResponse
+			body := receive(t, conn, &resp)
+			if resp.ID != 5 || resp.Result["mime_type"] != "image/png" {
+				t.Errorf("got header %+v, want id 5 with mime_type", resp)
+			}
+			if _, ok := resp.Result["data"]; ok {
+				t.Errorf("header carries data, want the body only after it")
+			}
+			if string(body) != string(testMedia) {
+				t.Errorf("got body %x, want %x", body, testMedia)
+			}
+
+			// A media call in a batch gets its own binary frame ahead of the batch reply
+			if err := writeMessage(conn, []interface{}{echo(1, "a"), media}); err != nil {
+				t.Fatalf("write: %v", err)
+			}
+			resp = testResponse{}
+			if body := receive(t, conn, &resp); resp.ID != 5 || string(body) != string(testMedia) {
+				t.Errorf("got id %d body %x, want id 5 body %x", resp.ID, body, testMedia)
+			}
+			var resps []testResponse
+			receive(t, conn, &resps)
+			if len(resps) != 1 {
+				t.Fatalf("got %d responses, want 1", len(resps))
+			}
+			checkEcho(t, resps[0], 1, "a")
+		})
+	}
+}
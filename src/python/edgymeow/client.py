@@ -3,18 +3,56 @@ EdgyMeow Client - Async JSON-RPC 2.0 client over WebSocket
 
 Uses the official `websockets` library for stable async WebSocket communication.
 Implements JSON-RPC 2.0 protocol for bidirectional communication with Go backend.
+Frames are MessagePack when the server accepts the jsonrpc-msgpack subprotocol,
+JSON text otherwise.
 """
 
 import asyncio
-import json
+import base64
+import collections
 import logging
-from typing import Any, Callable, Optional
+import sys
+from typing import Any, Callable, Dict, List, Optional
 
+import msgpack
+import orjson
 import websockets
 from websockets.exceptions import ConnectionClosed
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of in-flight requests (must be a power of two, slot = id & mask)
+MAX_PENDING_CALLS = 1024
+
+# How long call_deferred() waits for concurrent callers before flushing a batch
+BATCH_WINDOW_SECONDS = 0.001
+
+# Pre-encoded request prefixes for parameterless calls, keyed by method name.
+# Only the id changes between calls, so status/qr/rate_limit_stats polls skip
+# building and encoding a dict.
+_SKELETONS: Dict[str, bytes] = {}
+_MSGPACK_SKELETONS: Dict[str, bytes] = {}
+
+# WebSocket subprotocol for MessagePack frames; servers that don't support it fall back to JSON
+MSGPACK_SUBPROTOCOL = "jsonrpc-msgpack"
+
+# MessagePack extension type the server uses for timestamps, holding the same RFC 3339 string as JSON
+MSGPACK_TIME_EXT = 1
+
+# asyncio.timeout() (3.11+) cancels in place; wait_for() wraps the await in an extra task
+_HAS_ASYNCIO_TIMEOUT = sys.version_info >= (3, 11)
+
+
+def _msgpack_ext(code: int, data: bytes) -> Any:
+    """Decode timestamps to the string JSON clients get, keep other extensions as-is."""
+    if code == MSGPACK_TIME_EXT:
+        return data.decode()
+    return msgpack.ExtType(code, data)
+
+
+def _unpackb(message: bytes) -> Any:
+    return msgpack.unpackb(message, ext_hook=_msgpack_ext)
+
 
 class WhatsAppRPCClient:
     """Async JSON-RPC 2.0 client using official websockets library."""
@@ -28,11 +66,27 @@ class WhatsAppRPCClient:
         """
         self.ws_url = ws_url
         self.ws = None
-        self.request_id = 0
-        self.pending: dict[int, asyncio.Future] = {}
+        # Pending requests live in a fixed ring of slots. Each slot's request id
+        # advances by MAX_PENDING_CALLS on reuse, so id & mask gives the slot and
+        # late responses for timed out calls never match the current id.
+        # Callers wait on _slot_gate while every slot is in flight.
+        self._slots: List[Optional[asyncio.Future]] = [None] * MAX_PENDING_CALLS
+        self._slot_ids: List[int] = list(range(MAX_PENDING_CALLS))
+        self._free_slots: collections.deque = collections.deque(range(MAX_PENDING_CALLS))
+        self._slot_gate: Optional[asyncio.Semaphore] = None
+        self._batch_slot_lock: Optional[asyncio.Lock] = None
+        self._sinks: Dict[int, Any] = {}
+        self._deferred: List[dict] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # The loop only holds weak references to tasks, keep batch sends alive until they finish
+        self._send_tasks: set = set()
         self.event_callback: Optional[Callable[[dict], None]] = None
         self._recv_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._connected = False
+        self._msgpack = False
+        self._dumps: Callable[[Any], bytes] = orjson.dumps
+        self._loads: Callable[[Any], Any] = orjson.loads
 
     @property
     def connected(self) -> bool:
@@ -47,13 +101,25 @@ class WhatsAppRPCClient:
                 ping_interval=300,  # 5 minutes, same as Go server
                 ping_timeout=60,
                 max_size=100 * 1024 * 1024,  # 100 MB max message size for large media
+                max_queue=None,  # Receive loop dispatches immediately, no need for transport backpressure
                 close_timeout=10,
+                compression=None,  # Loopback link carrying mostly compressed media, deflate is pure CPU cost
+                subprotocols=[MSGPACK_SUBPROTOCOL],
             )
+            self._msgpack = self.ws.subprotocol == MSGPACK_SUBPROTOCOL
+            self._dumps = msgpack.packb if self._msgpack else orjson.dumps
+            self._loads = _unpackb if self._msgpack else orjson.loads
             self._connected = True
-            self._recv_task = asyncio.create_task(self._receive_loop())
+            self._loop = asyncio.get_running_loop()
+            if self._slot_gate is None:
+                # Created on the running loop, Python < 3.10 binds them to the loop at construction
+                self._slot_gate = asyncio.Semaphore(MAX_PENDING_CALLS)
+                self._batch_slot_lock = asyncio.Lock()
+            self._recv_task = self._loop.create_task(self._receive_loop())
             logger.info(f"Connected to RPC endpoint: {self.ws_url}")
         except Exception as e:
-            logger.error(f"Failed to connect to RPC endpoint: {e}")
+            # The caller gets the exception and decides whether it is final, e.g. between retries
+            logger.debug(f"Failed to connect to RPC endpoint: {e}")
             raise
 
     async def close(self) -> None:
@@ -75,22 +141,28 @@ class WhatsAppRPCClient:
         try:
             async for message in self.ws:
                 try:
-                    data = json.loads(message)
-
-                    if "id" in data and data["id"] is not None:
-                        # Response to a request
-                        req_id = data["id"]
-                        if req_id in self.pending:
-                            self.pending[req_id].set_result(data)
-                    elif data.get("method", "").startswith("event."):
-                        # Event notification from server
-                        if self.event_callback:
-                            try:
-                                self.event_callback(data)
-                            except Exception as e:
-                                logger.error(f"Error in event callback: {e}")
-                except json.JSONDecodeError as e:
-                    logger.error(f"Invalid JSON received: {e}")
+                    if isinstance(message, bytes) and message[:1] == b"\x00":
+                        # Binary response: [4-byte header length][header][raw body]
+                        header_len = int.from_bytes(message[:4], "big")
+                        data = self._loads(message[4:4 + header_len])
+                        sink = self._sinks.pop(data.get("id"), None)
+                        if sink is not None:
+                            # Write straight from the frame, no intermediate bytes copy
+                            sink.write(memoryview(message)[4 + header_len:])
+                            data["result"]["data"] = sink
+                        else:
+                            data["result"]["data"] = message[4 + header_len:]
+                    else:
+                        data = self._loads(message)
+
+                    if isinstance(data, list):
+                        # Batch response
+                        for item in data:
+                            self._dispatch(item)
+                    else:
+                        self._dispatch(data)
+                except ValueError as e:
+                    logger.error(f"Invalid message received: {e}")
         except ConnectionClosed:
             logger.warning("WebSocket connection closed")
             self._connected = False
@@ -98,7 +170,25 @@ class WhatsAppRPCClient:
             logger.error(f"Error in receive loop: {e}")
             self._connected = False
 
-    async def call(self, method: str, params: Any = None, timeout: float = 30) -> Any:
+    def _dispatch(self, data: dict) -> None:
+        """Route a single response to its pending call, or an event to the callback."""
+        if "id" in data and data["id"] is not None:
+            # Response to a request; ids that aren't ints were never sent by us
+            req_id = data["id"]
+            if not isinstance(req_id, int):
+                return
+            slot = req_id & (MAX_PENDING_CALLS - 1)
+            if self._slot_ids[slot] == req_id and self._slots[slot] is not None:
+                self._slots[slot].set_result(data)
+        elif data.get("method", "").startswith("event."):
+            # Event notification from server
+            if self.event_callback:
+                try:
+                    self.event_callback(data)
+                except Exception as e:
+                    logger.error(f"Error in event callback: {e}")
+
+    async def call(self, method: str, params: Any = None, timeout: float = 30, sink: Any = None) -> Any:
         """
         Call RPC method and wait for response.
 
@@ -106,6 +196,7 @@ class WhatsAppRPCClient:
             method: RPC method name (e.g., 'status', 'send')
             params: Method parameters (optional)
             timeout: Response timeout in seconds
+            sink: Writable file object for the raw body of a binary response (optional)
 
         Returns:
             Result from the RPC call
@@ -116,29 +207,198 @@ class WhatsAppRPCClient:
         if not self.connected:
             raise Exception("Not connected to RPC endpoint")
 
-        self.request_id += 1
-        req_id = self.request_id
+        slot, req_id, future = await self._acquire_slot()
+
+        if params is None and self._msgpack:
+            skeleton = _MSGPACK_SKELETONS.get(method)
+            if skeleton is None:
+                # 3-entry fixmap with the id packed last
+                skeleton = _MSGPACK_SKELETONS[method] = (
+                    b"\x83" + msgpack.packb("jsonrpc") + msgpack.packb("2.0")
+                    + msgpack.packb("method") + msgpack.packb(method) + msgpack.packb("id")
+                )
+            payload = skeleton + msgpack.packb(req_id)
+        elif params is None:
+            skeleton = _SKELETONS.get(method)
+            if skeleton is None:
+                skeleton = _SKELETONS[method] = b'{"jsonrpc":"2.0","method":' + orjson.dumps(method) + b',"id":'
+            payload = skeleton + str(req_id).encode() + b"}"
+        else:
+            payload = self._dumps({"jsonrpc": "2.0", "id": req_id, "method": method, "params": params})
+
+        if sink is not None:
+            self._sinks[req_id] = sink
+        try:
+            await self.ws.send(payload)
+            result = await self._wait_result(method, future, timeout)
+            if sink is not None and not (isinstance(result, dict) and result.get("data") is sink):
+                self._fill_sink(method, result, sink)
+            return result
+        finally:
+            if sink is not None:
+                self._sinks.pop(req_id, None)
+            self._release_slot(slot)
+
+    @staticmethod
+    def _fill_sink(method: str, result: Any, sink: Any) -> None:
+        """Write a body that came back inline instead of in a binary frame to the sink."""
+        data = result.get("data") if isinstance(result, dict) else None
+        if isinstance(data, str):
+            # Servers without binary frame support ignore "binary" and send base64
+            sink.write(base64.b64decode(data))
+        elif isinstance(data, (bytes, bytearray)):
+            sink.write(data)
+        else:
+            raise Exception(f"RPC call '{method}' returned no body for the sink")
+        result["data"] = sink
+
+    async def notify(self, method: str, params: Any = None) -> None:
+        """
+        Send a JSON-RPC notification (no id) without waiting for a response.
+
+        The server handles notifications but never replies, so errors are
+        not reported back.
 
-        request = {"jsonrpc": "2.0", "id": req_id, "method": method}
+        Args:
+            method: RPC method name (e.g., 'typing')
+            params: Method parameters (optional)
+        """
+        if not self.connected:
+            raise Exception("Not connected to RPC endpoint")
+
+        request = {"jsonrpc": "2.0", "method": method}
         if params is not None:
             request["params"] = params
+        await self.ws.send(self._dumps(request))
+
+    async def call_batch(self, calls: list, timeout: float = 30) -> list:
+        """
+        Call several RPC methods in one JSON-RPC 2.0 batch frame.
+
+        Args:
+            calls: List of (method, params) tuples
+            timeout: Response timeout in seconds
 
-        future = asyncio.get_event_loop().create_future()
-        self.pending[req_id] = future
+        Returns:
+            List of results in the same order as calls
 
+        Raises:
+            Exception: If any call fails or times out (first failure is raised)
+        """
+        if not self.connected:
+            raise Exception("Not connected to RPC endpoint")
+        if not calls:
+            return []
+        if len(calls) > MAX_PENDING_CALLS:
+            raise Exception(f"Batch too large ({len(calls)} calls, max {MAX_PENDING_CALLS})")
+
+        slots = []
+        futures = []
+        requests = []
         try:
-            await self.ws.send(json.dumps(request))
-            response = await asyncio.wait_for(future, timeout)
+            # One batch gathers its slots at a time, so two partly filled batches can't wait on each other forever
+            async with self._batch_slot_lock:
+                for _ in calls:
+                    slots.append(await self._acquire_slot())
+            for (method, params), (slot, req_id, future) in zip(calls, slots):
+                futures.append(future)
+                request = {"jsonrpc": "2.0", "id": req_id, "method": method}
+                if params is not None:
+                    request["params"] = params
+                requests.append(request)
+
+            await self.ws.send(self._dumps(requests))
+            results = await asyncio.gather(
+                *(self._wait_result(method, future, timeout) for (method, _), future in zip(calls, futures)),
+                return_exceptions=True,
+            )
+        finally:
+            for slot, _, _ in slots:
+                self._release_slot(slot)
 
-            if "error" in response and response["error"]:
-                error = response["error"]
-                raise Exception(f"RPC Error {error.get('code', -1)}: {error.get('message', 'Unknown error')}")
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return results
 
-            return response.get("result")
+    async def call_deferred(self, method: str, params: Any = None, timeout: float = 30) -> Any:
+        """
+        Call RPC method, coalescing with other calls made within BATCH_WINDOW_SECONDS.
+
+        Concurrent callers are flushed together as a single batch frame.
+        Same arguments and return value as call().
+        """
+        if not self.connected:
+            raise Exception("Not connected to RPC endpoint")
+
+        slot, req_id, future = await self._acquire_slot()
+
+        request = {"jsonrpc": "2.0", "id": req_id, "method": method}
+        if params is not None:
+            request["params"] = params
+        self._deferred.append(request)
+        if self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(BATCH_WINDOW_SECONDS, self._flush_deferred)
+
+        try:
+            return await self._wait_result(method, future, timeout)
+        finally:
+            self._release_slot(slot)
+
+    def _flush_deferred(self) -> None:
+        """Send all deferred requests as one batch frame."""
+        self._flush_handle = None
+        requests, self._deferred = self._deferred, []
+        if requests:
+            task = self._loop.create_task(self._send_batch(requests))
+            self._send_tasks.add(task)
+            task.add_done_callback(self._send_tasks.discard)
+
+    async def _send_batch(self, requests: list) -> None:
+        """Send a batch, failing its pending calls if the send fails."""
+        try:
+            await self.ws.send(self._dumps(requests))
+        except Exception as e:
+            for request in requests:
+                slot = request["id"] & (MAX_PENDING_CALLS - 1)
+                future = self._slots[slot]
+                if self._slot_ids[slot] == request["id"] and future is not None and not future.done():
+                    future.set_exception(e)
+
+    async def _wait_result(self, method: str, future: asyncio.Future, timeout: float) -> Any:
+        """Wait for a response future and unwrap its result or error."""
+        try:
+            if _HAS_ASYNCIO_TIMEOUT:
+                async with asyncio.timeout(timeout):
+                    response = await future
+            else:
+                response = await asyncio.wait_for(future, timeout)
         except asyncio.TimeoutError:
             raise Exception(f"RPC call '{method}' timed out after {timeout}s")
-        finally:
-            self.pending.pop(req_id, None)
+
+        if "error" in response and response["error"]:
+            error = response["error"]
+            raise Exception(f"RPC Error {error.get('code', -1)}: {error.get('message', 'Unknown error')}")
+
+        return response.get("result")
+
+    async def _acquire_slot(self) -> tuple:
+        """Reserve a pending-request slot, returning (slot, request id, future).
+
+        Waits while all MAX_PENDING_CALLS slots are in flight.
+        """
+        await self._slot_gate.acquire()
+        slot = self._free_slots.popleft()
+        self._slot_ids[slot] += MAX_PENDING_CALLS
+        future = self._loop.create_future()
+        self._slots[slot] = future
+        return slot, self._slot_ids[slot], future
+
+    def _release_slot(self, slot: int) -> None:
+        """Return a slot to the free list."""
+        self._slots[slot] = None
+        self._free_slots.append(slot)
+        self._slot_gate.release()
 
     # Convenience methods for each RPC command
     async def status(self) -> dict:
@@ -188,18 +448,34 @@ class WhatsAppRPCClient:
         """
         return await self.call("send", kwargs)
 
-    async def media(self, message_id: str) -> dict:
+    async def send_many(self, messages: list) -> list:
+        """
+        Send several messages concurrently over the shared connection.
+
+        All requests are written without waiting for earlier responses.
+
+        Args:
+            messages: List of dicts with the same keys as send()
+
+        Returns:
+            List of results in the same order as messages; failed sends
+            are returned as Exception instances
+        """
+        return await asyncio.gather(*(self.call("send", m) for m in messages), return_exceptions=True)
+
+    async def media(self, message_id: str, sink: Any = None) -> dict:
         """
         Download media from a received message.
 
         Args:
             message_id: ID of the message containing media
+            sink: Writable file object to receive the bytes (optional)
 
         Returns:
-            Dict with 'data' (base64) and 'mime_type'
+            Dict with 'data' (raw bytes, or sink if given), 'mime_type' and 'size'
         """
         # Use longer timeout for media downloads (videos can be large)
-        return await self.call("media", {"message_id": message_id}, timeout=120)
+        return await self.call("media", {"message_id": message_id, "binary": True}, timeout=120, sink=sink)
 
     async def groups(self) -> list:
         """
@@ -266,34 +542,40 @@ class WhatsAppRPCClient:
         """
         return await self.call("contact_profile_pic", {"jid": jid, "preview": preview})
 
-    async def typing(self, jid: str, state: str = "composing", media: str = "") -> dict:
+    async def typing(self, jid: str, state: str = "composing", media: str = "", wait: bool = False) -> Optional[dict]:
         """
-        Send typing indicator to a chat.
+        Send typing indicator to a chat (fire-and-forget notification by default).
 
         Args:
             jid: Chat JID (individual or group)
             state: 'composing' (typing) or 'paused' (stopped typing)
             media: '' for text typing, 'audio' for recording voice
+            wait: Send as a call and wait for the reply, so failures raise
 
         Returns:
-            Success message
+            Success message when wait is set, otherwise None
         """
         params = {"jid": jid, "state": state}
         if media:
             params["media"] = media
-        return await self.call("typing", params)
+        if wait:
+            return await self.call("typing", params)
+        await self.notify("typing", params)
 
-    async def presence(self, status: str) -> dict:
+    async def presence(self, status: str, wait: bool = False) -> Optional[dict]:
         """
-        Set online/offline presence status.
+        Set online/offline presence status (fire-and-forget notification by default).
 
         Args:
             status: 'available' (online) or 'unavailable' (offline)
+            wait: Send as a call and wait for the reply, so failures raise
 
         Returns:
-            Success message
+            Success message when wait is set, otherwise None
         """
-        return await self.call("presence", {"status": status})
+        if wait:
+            return await self.call("presence", {"status": status})
+        await self.notify("presence", {"status": status})
 
     async def mark_read(self, message_ids: list, chat_jid: str, sender_jid: str = None) -> dict:
         """
@@ -0,0 +1,77 @@
+"""Tests for WhatsAppRPCClient against an in-process fake JSON-RPC server."""
+
+import asyncio
+import json
+import unittest
+
+import websockets
+
+from edgymeow.client import MAX_PENDING_CALLS, WhatsAppRPCClient
+
+
+class FakeServer:
+    """JSON-RPC server that answers every request after a delay."""
+
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.extra_frames = []
+        self.server = None
+
+    async def _answer(self, ws, request):
+        await asyncio.sleep(self.delay)
+        await ws.send(json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": request.get("params")}))
+
+    async def _handler(self, ws, *args):
+        async for message in ws:
+            for frame in self.extra_frames:
+                await ws.send(frame)
+            data = json.loads(message)
+            for request in data if isinstance(data, list) else [data]:
+                if request.get("id") is not None:
+                    asyncio.ensure_future(self._answer(ws, request))
+
+    async def __aenter__(self):
+        self.server = await websockets.serve(self._handler, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class WhatsAppRPCClientTest(unittest.IsolatedAsyncioTestCase):
+    async def test_calls_past_max_pending_wait_for_a_slot(self):
+        async with FakeServer(delay=0.2) as server:
+            client = WhatsAppRPCClient(server.url)
+            await client.connect()
+            try:
+                messages = [{"phone": str(i), "message": "hi"} for i in range(MAX_PENDING_CALLS + 476)]
+                results = await client.send_many(messages)
+                self.assertEqual(results, messages)
+
+                deferred = [client.call_deferred("echo", {"n": i}) for i in range(MAX_PENDING_CALLS + 10)]
+                self.assertEqual(await asyncio.gather(*deferred), [{"n": i} for i in range(MAX_PENDING_CALLS + 10)])
+            finally:
+                await client.close()
+
+    async def test_responses_with_unknown_ids_are_ignored(self):
+        async with FakeServer() as server:
+            server.extra_frames = [
+                json.dumps({"jsonrpc": "2.0", "id": "abc", "result": None}),
+                json.dumps({"jsonrpc": "2.0", "id": 1.5, "result": None}),
+                json.dumps({"jsonrpc": "2.0", "id": 123456789, "result": None}),
+            ]
+            client = WhatsAppRPCClient(server.url)
+            await client.connect()
+            try:
+                self.assertEqual(await client.call("echo", {"a": 1}, timeout=5), {"a": 1})
+                self.assertTrue(client.connected)
+                self.assertEqual(await client.call("echo", {"a": 2}, timeout=5), {"a": 2})
+            finally:
+                await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,18 +1,30 @@
 """
 WhatsApp Controller Web UI - WebSocket RPC Version
 Uses WebSocket RPC as the primary and only communication method with Go backend.
+Runs as an ASGI app (Quart + python-socketio on Uvicorn) so routes and Socket.IO
+handlers await the RPC client directly on a single event loop.
 """
 
 import os
+import sys
 import asyncio
 import json
 import logging
-import threading
+import tempfile
 import time
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, send_from_directory
-from flask_socketio import SocketIO, emit
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from datetime import timedelta
+from functools import wraps
+from typing import Annotated, Optional
+
+import msgspec
+import orjson
+import ormsgpack
+import socketio
+import uvicorn
+from quart import Quart, Response, render_template, request, jsonify, redirect, url_for, flash, send_from_directory
+from quart.json.provider import DefaultJSONProvider
+from quart_rate_limiter import RateLimiter, RateLimit, remote_addr_key
+from werkzeug.exceptions import NotFound
 
 from rpc_client import WhatsAppRPCClient
 
@@ -23,96 +35,434 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson; jsonify() bodies are encoded straight to bytes"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+class OrjsonSocketIO:
+    """Stand-in for the json module so python-socketio encodes packets with orjson"""
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    @staticmethod
+    def loads(s, **kwargs):
+        return orjson.loads(s)
+
+
+app = Quart(__name__)
+app.json = OrjsonProvider(app)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
-socketio_app = SocketIO(app, cors_allowed_origins="*")
+app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # Match RPC max message size for media sends
+socketio_app = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins="*", json=OrjsonSocketIO)
+asgi_app = socketio.ASGIApp(socketio_app, other_asgi_app=app)
 
 # Configuration
 GO_WS_RPC_URL = os.getenv('GO_WS_RPC_URL', 'ws://localhost:9400/ws/rpc')
+# How long startup keeps retrying the backend connection (e.g. while the Go container boots)
+RPC_CONNECT_TIMEOUT = float(os.getenv('RPC_CONNECT_TIMEOUT', '5'))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 # Rate Limiting Configuration
 RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
 RATE_LIMIT_GLOBAL = os.getenv('RATE_LIMIT_GLOBAL', '20 per minute')
 RATE_LIMIT_PER_USER = os.getenv('RATE_LIMIT_PER_USER', '10 per minute')
-MESSAGE_DELAY_SECONDS = float(os.getenv('MESSAGE_DELAY_SECONDS', '3'))
+
+# Media downloads larger than this are spooled to disk instead of memory
+MEDIA_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+# WhatsApp events are forwarded to browsers in batches at most this often
+EVENT_BATCH_INTERVAL = 0.05
+
+# Socket.IO replies to one browser are coalesced into a single 'batch' emit
+REPLY_BATCH_INTERVAL = 0.025
+REPLY_BATCH_MAX = 128
+
+# rpc_client.status() results are reused for this long, so page loads and reconnecting tabs share one RPC
+STATUS_CACHE_TTL = 0.5
+
+# contact_check requests arriving within this window are merged into one RPC
+CONTACT_CHECK_BATCH_WINDOW = 0.015
+
+# Rate limit reads polled by the settings page are served stale-while-revalidate after these TTLs
+RATE_LIMIT_CONFIG_TTL = 1.0
+RATE_LIMIT_STATS_TTL = 0.5
+
+
+def parse_rate_limit(value):
+    """Parse a '<count> per <second|minute|hour|day>' string into a RateLimit"""
+    count, _, period = value.partition(' per ')
+    return RateLimit(int(count), timedelta(**{period.strip().rstrip('s') + 's': 1}))
+
 
 # Initialize rate limiter
-limiter = Limiter(
-    app=app,
-    key_func=get_remote_address,
-    default_limits=[] if not RATE_LIMIT_ENABLED else [RATE_LIMIT_GLOBAL],
-    storage_uri="memory://",
-    strategy="fixed-window"
+limiter = RateLimiter(
+    app,
+    default_limits=[] if not RATE_LIMIT_ENABLED else [parse_rate_limit(RATE_LIMIT_GLOBAL)],
 )
+PER_USER_LIMIT = parse_rate_limit(RATE_LIMIT_PER_USER)
+
+# Per-recipient token buckets for send endpoints: key -> (tokens, last refill time).
+# Keys come from the request, so full buckets are swept once per limit period.
+send_buckets: dict = {}
+
+# RPC client shares the ASGI server's event loop; connected in init_rpc_client()
+rpc_client = WhatsAppRPCClient(GO_WS_RPC_URL)
+
+# Bound methods for the Socket.IO handlers, resolved once instead of per event
+rpc_contact_profile_pic = rpc_client.contact_profile_pic
+rpc_typing = rpc_client.typing
+rpc_presence = rpc_client.presence
+rpc_mark_read = rpc_client.mark_read
+rpc_rate_limit_set = rpc_client.rate_limit_set
+rpc_rate_limit_unpause = rpc_client.rate_limit_unpause
+
+# Last status() result, when it goes stale, and the RPC currently fetching a fresh one
+status_value = None
+status_expiry = 0.0
+status_inflight = None
+
+# Stale-while-revalidate entries: name -> {"value", "expiry", "refreshing"}
+swr_cache: dict = {}
+
+# contact_check callers waiting for the next merged RPC: (phones, future)
+contact_check_waiters: list = []
+
+# WhatsApp events waiting for the next batch emit
+event_buffer: list = []
+event_flush_scheduled = False
 
-# RPC Client globals
-rpc_loop: asyncio.AbstractEventLoop = None
-rpc_client: WhatsAppRPCClient = None
+# Socket.IO replies waiting for the next per-client batch emit, keyed by sid
+pending_replies: dict = {}
 
+# RPC method name -> Socket.IO event type ("event.message_received" -> "message_received")
+_EVENT_TYPE_CACHE: dict = {}
 
-def get_recipient_key():
+
+async def get_recipient_key():
     """Extract recipient (phone or group_id) for per-user rate limiting"""
     try:
         if request.is_json:
-            data = request.json
-            return data.get('phone') or data.get('group_id') or get_remote_address()
-        elif request.form:
-            return request.form.get('phone') or request.form.get('group_id') or get_remote_address()
+            data = await request.get_json()
+            return data.get('phone') or data.get('group_id') or await remote_addr_key()
+        form = await request.form
+        if form:
+            return form.get('phone') or form.get('group_id') or await remote_addr_key()
     except:
         pass
-    return get_remote_address()
+    return await remote_addr_key()
+
+
+def recipient_rate_limit(limit):
+    """Per-recipient token bucket limit for send endpoints"""
+    capacity = limit.count
+    refill_rate = limit.count / limit.period.total_seconds()
+    sweep_interval = limit.period.total_seconds()
+    next_sweep = time.monotonic() + sweep_interval
+
+    def sweep(now):
+        """Drop buckets that have refilled to capacity, a missing bucket starts full anyway"""
+        for key, (tokens, last) in list(send_buckets.items()):
+            if tokens + (now - last) * refill_rate >= capacity:
+                del send_buckets[key]
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            nonlocal next_sweep
+            # Body values can be any JSON type, str() keeps lists and dicts usable as dict keys
+            key = str(await get_recipient_key())
+            # Single event loop and no await between read and update, so no lock needed
+            now = time.monotonic()
+            if now >= next_sweep:
+                next_sweep = now + sweep_interval
+                sweep(now)
+            tokens, last = send_buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * refill_rate)
+            if tokens < 1:
+                send_buckets[key] = (tokens, now)
+                return jsonify(fail("Rate limit exceeded, try again later")), 429
+            send_buckets[key] = (tokens - 1, now)
+            return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class MediaBody:
+    """RPC media sink that only keeps the body, so spooling it can run off the event loop"""
+
+    def __init__(self):
+        self.data = None
+
+    def write(self, data):
+        self.data = data
+
+
+def spool_media(data):
+    """Copy a media body to a spooled temp file; blocking, run it in a worker thread"""
+    media_file = tempfile.SpooledTemporaryFile(max_size=MEDIA_SPOOL_MAX_BYTES)
+    try:
+        media_file.write(data)
+        media_file.seek(0)
+    except BaseException:
+        media_file.close()
+        raise
+    return media_file
 
 
-def apply_message_delay():
-    """Add delay between messages to simulate human behavior"""
-    if RATE_LIMIT_ENABLED and MESSAGE_DELAY_SECONDS > 0:
-        time.sleep(MESSAGE_DELAY_SECONDS)
+async def iter_file(file, chunk_size=256 * 1024):
+    """Stream a file object in chunks, closing it when done"""
+    try:
+        while True:
+            # Reads past the spool size hit the disk, keep them off the event loop
+            chunk = await asyncio.to_thread(file.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        file.close()
+
+
+def on_event(event):
+    """Queue WhatsApp events from the RPC client for the next batch emit"""
+    global event_flush_scheduled
+    try:
+        method = event.get("method", "")
+        event_type = _EVENT_TYPE_CACHE.get(method)
+        if event_type is None:
+            event_type = _EVENT_TYPE_CACHE[method] = method[6:] if method.startswith("event.") else method
+
+        event_buffer.append({"type": event_type, "data": event.get("params", {})})
+        if not event_flush_scheduled:
+            event_flush_scheduled = True
+            socketio_app.start_background_task(flush_events)
+        logger.debug("Event queued: %s", event_type)
+    except Exception as e:
+        logger.error("Error forwarding event: %s", e)
 
 
-def run_async(coro, timeout=30):
-    """Run async coroutine from sync Flask context."""
-    if rpc_loop is None or rpc_client is None:
-        raise Exception("RPC client not initialized")
-    if not rpc_client.connected:
-        raise Exception("RPC client not connected")
-    return asyncio.run_coroutine_threadsafe(coro, rpc_loop).result(timeout=timeout)
+async def flush_events():
+    """Emit buffered WhatsApp events to Socket.IO clients as one batch"""
+    global event_flush_scheduled
+    await socketio_app.sleep(EVENT_BATCH_INTERVAL)
+    events = event_buffer.copy()
+    event_buffer.clear()
+    event_flush_scheduled = False
+    try:
+        await socketio_app.emit('whatsapp_event_batch', events)
+        logger.debug("Forwarded %d events", len(events))
+    except Exception as e:
+        logger.error("Error forwarding events: %s", e)
 
 
-def init_rpc_client():
-    """Initialize RPC client in background thread."""
-    global rpc_loop, rpc_client
+async def get_status():
+    """Return rpc_client.status(), cached for STATUS_CACHE_TTL; concurrent callers share one in-flight RPC"""
+    global status_inflight
+    if time.monotonic() < status_expiry:
+        return status_value
+    if status_inflight is None:
+        status_inflight = asyncio.ensure_future(fetch_status())
+    # Shield so a cancelled caller does not cancel the fetch for everyone else
+    return await asyncio.shield(status_inflight)
 
-    rpc_client = WhatsAppRPCClient(GO_WS_RPC_URL)
 
-    # Set event callback to forward to Socket.IO clients
-    def on_event(event):
-        try:
-            method = event.get("method", "")
-            event_type = method.replace("event.", "") if method.startswith("event.") else method
-            params = event.get("params", {})
+async def fetch_status():
+    """Fetch status from the backend and refresh the cache (errors are not cached)"""
+    global status_value, status_expiry, status_inflight
+    try:
+        status_value = await rpc_client.status()
+        status_expiry = time.monotonic() + STATUS_CACHE_TTL
+        return status_value
+    finally:
+        status_inflight = None
+
+
+async def swr_get(name, fetch, ttl):
+    """Return the cached fetch() result, refreshing it in the background once older than ttl"""
+    entry = swr_cache.get(name)
+    if entry is None:
+        value = await fetch()
+        swr_cache[name] = {"value": value, "expiry": time.monotonic() + ttl, "refreshing": False}
+        return value
+    if time.monotonic() >= entry["expiry"] and not entry["refreshing"]:
+        entry["refreshing"] = True
+        socketio_app.start_background_task(swr_refresh, name, entry, fetch, ttl)
+    return entry["value"]
+
+
+async def swr_refresh(name, entry, fetch, ttl):
+    """Refresh a stale entry; on failure drop it so the next read fetches and reports the error"""
+    try:
+        entry["value"] = await fetch()
+        entry["expiry"] = time.monotonic() + ttl
+    except Exception as e:
+        logger.warning("Background refresh of %s failed: %s", name, e)
+        if swr_cache.get(name) is entry:
+            del swr_cache[name]
+    finally:
+        entry["refreshing"] = False
 
-            data = {"type": event_type, "data": params}
-            socketio_app.emit('whatsapp_event', data, namespace='/')
-            logger.debug(f"Event forwarded: {event_type}")
-        except Exception as e:
-            logger.error(f"Error forwarding event: {e}")
 
-    rpc_client.event_callback = on_event
+async def get_rate_limit_config():
+    """rpc_client.rate_limit_get(), served stale-while-revalidate"""
+    return await swr_get('rate_limit_get', rpc_client.rate_limit_get, RATE_LIMIT_CONFIG_TTL)
+
+
+async def get_rate_limit_stats():
+    """rpc_client.rate_limit_stats(), served stale-while-revalidate"""
+    return await swr_get('rate_limit_stats', rpc_client.rate_limit_stats, RATE_LIMIT_STATS_TTL)
+
+
+def invalidate_rate_limit_cache():
+    """Forget cached rate limit reads after the config or pause state changes"""
+    swr_cache.pop('rate_limit_get', None)
+    swr_cache.pop('rate_limit_stats', None)
+
+
+async def batched_contact_check(phones):
+    """Check phones through one contact_check RPC shared with other callers in the same window"""
+    future = asyncio.get_running_loop().create_future()
+    if not contact_check_waiters:
+        socketio_app.start_background_task(flush_contact_checks)
+    contact_check_waiters.append((phones, future))
+    return await future
+
+
+async def flush_contact_checks():
+    """Send the union of waiting phones as one contact_check and hand each caller its own results"""
+    await socketio_app.sleep(CONTACT_CHECK_BATCH_WINDOW)
+    waiters = contact_check_waiters.copy()
+    contact_check_waiters.clear()
+    if len(waiters) == 1:
+        # Nothing to split, the caller gets the backend's results as they are
+        await resolve_contact_check(*waiters[0])
+        return
+    phones = list(dict.fromkeys(phone for batch, _ in waiters for phone in batch))
+    try:
+        results = await rpc_client.contact_check(phones)
+    except Exception:
+        # One caller's bad input fails the merged call, retry each caller on its own
+        await asyncio.gather(*(resolve_contact_check(batch, future) for batch, future in waiters))
+        return
+    by_query = {r.get('query'): r for r in results}
+    retry = []
+    for batch, future in waiters:
+        if not all(phone in by_query for phone in batch):
+            # The backend rewrote a query (e.g. normalized the number), results can't be matched back
+            retry.append(resolve_contact_check(batch, future))
+        elif not future.done():
+            future.set_result([by_query[phone] for phone in batch])
+    if retry:
+        await asyncio.gather(*retry)
+
+
+async def resolve_contact_check(phones, future):
+    """Run contact_check for a single caller and settle its future with the outcome"""
+    try:
+        results = await rpc_client.contact_check(phones)
+    except Exception as e:
+        if not future.done():
+            future.set_exception(e)
+        return
+    if not future.done():
+        future.set_result(results)
+
+
+def ok(data=None, **extra):
+    """Success envelope for API responses and Socket.IO replies"""
+    if extra:
+        return {"success": True, "data": data, **extra}
+    return {"success": True, "data": data}
+
+
+def fail(error, **extra):
+    """Error envelope for API responses and Socket.IO replies; error may be a message or an exception"""
+    if extra:
+        return {"success": False, "error": str(error), **extra}
+    return {"success": False, "error": str(error)}
+
+
+def rpc_handler(event, action, invalid="invalid request"):
+    """Reply fail() on event when a Socket.IO handler raises; backend errors are logged as 'Failed to <action>'
+
+    Payloads that fail validation get the invalid message, msgspec's own wording is not shown to the UI.
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(sid, *args):
+            try:
+                await func(sid, *args)
+            except msgspec.ValidationError:
+                queue_reply(sid, event, fail(invalid))
+            except Exception as e:
+                logger.error("Failed to %s: %s", action, e)
+                queue_reply(sid, event, fail(e))
+        return wrapper
+    return decorator
+
+
+def queue_reply(sid, event, payload):
+    """Queue a Socket.IO reply to sid for the client's next batch emit"""
+    replies = pending_replies.get(sid)
+    if replies is None:
+        replies = pending_replies[sid] = []
+        socketio_app.start_background_task(flush_replies, sid, REPLY_BATCH_INTERVAL)
+    replies.append((event, payload))
+    if len(replies) >= REPLY_BATCH_MAX:
+        socketio_app.start_background_task(flush_replies, sid, 0)
+
+
+async def flush_replies(sid, delay):
+    """Emit queued replies to sid as one MessagePack-encoded [[event, payload], ...] batch"""
+    if delay:
+        await socketio_app.sleep(delay)
+    replies = pending_replies.pop(sid, None)
+    if not replies:
+        return
+    try:
+        # Sent as a single binary attachment; base.html decodes it with MessagePack
+        await socketio_app.emit('batch', ormsgpack.packb(replies, option=ormsgpack.OPT_NON_STR_KEYS), to=sid)
+    except Exception as e:
+        logger.error("Error sending replies: %s", e)
+
 
-    def start_loop():
-        global rpc_loop
-        rpc_loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(rpc_loop)
+@app.before_serving
+async def init_rpc_client():
+    """Connect RPC client on the server's event loop, retrying with backoff until RPC_CONNECT_TIMEOUT."""
+    rpc_client.event_callback = on_event
+    deadline = time.monotonic() + RPC_CONNECT_TIMEOUT
+    delay = 0.01
+    while True:
         try:
-            rpc_loop.run_until_complete(rpc_client.connect())
-            logger.info(f"RPC client connected to {GO_WS_RPC_URL}")
-            rpc_loop.run_forever()
+            await rpc_client.connect()
+            logger.info("RPC client connected to %s", GO_WS_RPC_URL)
+            return
         except Exception as e:
-            logger.error(f"RPC client connection failed: {e}")
+            if time.monotonic() + delay > deadline:
+                logger.error("RPC client connection failed: %s", e)
+                return
+            logger.debug("RPC client not reachable yet, retrying in %.2fs: %s", delay, e)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.5)
 
-    thread = threading.Thread(target=start_loop, daemon=True)
-    thread.start()
-    logger.info("RPC client initialization started")
+
+@app.after_serving
+async def close_rpc_client():
+    """Close RPC connection on shutdown."""
+    await rpc_client.close()
 
 
 # ============================================================================
@@ -120,174 +470,176 @@ def init_rpc_client():
 # ============================================================================
 
 @app.route('/')
-def index():
+async def index():
     """Main dashboard"""
     try:
-        status = run_async(rpc_client.status())
-        return render_template('dashboard.html', status={"success": True, "data": status})
+        status = await get_status()
+        return await render_template('dashboard.html', status=ok(status))
     except Exception as e:
-        return render_template('dashboard.html', status={"success": False, "error": str(e)})
+        return await render_template('dashboard.html', status=fail(e))
 
 
 @app.route('/api/status')
-def api_status():
+async def api_status():
     """Get WhatsApp connection status"""
     try:
-        result = run_async(rpc_client.status())
-        return jsonify({"success": True, "data": result})
+        result = await get_status()
+        return jsonify(ok(result))
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return jsonify(fail(e)), 500
 
 
 @app.route('/api/start', methods=['POST'])
-def api_start():
+async def api_start():
     """Start WhatsApp service"""
     try:
-        result = run_async(rpc_client.start())
-        return jsonify({"success": True, "data": result})
+        result = await rpc_client.start()
+        return jsonify(ok(result))
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return jsonify(fail(e)), 500
 
 
 @app.route('/api/stop', methods=['POST'])
-def api_stop():
+async def api_stop():
     """Stop WhatsApp service"""
     try:
-        result = run_async(rpc_client.stop())
-        return jsonify({"success": True, "data": result})
+        result = await rpc_client.stop()
+        return jsonify(ok(result))
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return jsonify(fail(e)), 500
 
 
 @app.route('/api/restart', methods=['POST'])
-def api_restart():
+async def api_restart():
     """Restart WhatsApp service"""
     try:
-        result = run_async(rpc_client.restart())
-        return jsonify({"success": True, "data": result})
+        result = await rpc_client.restart()
+        return jsonify(ok(result))
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return jsonify(fail(e)), 500
 
 
 @app.route('/api/reset', methods=['POST'])
-def api_reset():
+async def api_reset():
     """Reset WhatsApp session"""
     try:
-        result = run_async(rpc_client.reset())
-        return jsonify({"success": True, "data": result})
+        result = await rpc_client.reset()
+        return jsonify(ok(result))
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return jsonify(fail(e)), 500
 
 
 @app.route('/api/qr')
-def api_qr():
+async def api_qr():
     """Get QR code information"""
     try:
-        result = run_async(rpc_client.qr())
-        return jsonify({"success": True, "data": result})
+        result = await rpc_client.qr()
+        return jsonify(ok(result))
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 404
+        return jsonify(fail(e)), 404
 
 
 @app.route('/api/diagnostics')
-def api_diagnostics():
+async def api_diagnostics():
     """Get diagnostics information"""
     try:
-        result = run_async(rpc_client.diagnostics())
-        return jsonify({"success": True, "data": result})
+        result = await rpc_client.diagnostics()
+        return jsonify(ok(result))
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return jsonify(fail(e)), 500
 
 
 @app.route('/api/send', methods=['POST'])
-@limiter.limit(RATE_LIMIT_PER_USER, key_func=get_recipient_key)
-def api_send():
+@recipient_rate_limit(PER_USER_LIMIT)
+async def api_send():
     """Send WhatsApp message (simple)"""
-    data = request.json
+    data = await request.get_json()
     if not data or 'phone' not in data or 'message' not in data:
-        return jsonify({"success": False, "error": "Phone and message required"}), 400
-
-    apply_message_delay()
+        return jsonify(fail("Phone and message required")), 400
 
     try:
-        result = run_async(rpc_client.send(
+        result = await rpc_client.send(
             phone=data['phone'],
             message=data['message'],
             type='text'
-        ))
-        return jsonify({"success": True, "data": result})
+        )
+        return jsonify(ok(result))
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return jsonify(fail(e)), 500
 
 
 @app.route('/api/send/enhanced', methods=['POST'])
-@limiter.limit(RATE_LIMIT_PER_USER, key_func=get_recipient_key)
-def api_send_enhanced():
+@recipient_rate_limit(PER_USER_LIMIT)
+async def api_send_enhanced():
     """Send enhanced WhatsApp message (all types)"""
-    data = request.json
+    data = await request.get_json()
     if not data:
-        return jsonify({"success": False, "error": "Message data required"}), 400
-
-    apply_message_delay()
+        return jsonify(fail("Message data required")), 400
 
     try:
-        result = run_async(rpc_client.send(**data))
-        return jsonify({"success": True, "data": result})
+        result = await rpc_client.send(**data)
+        return jsonify(ok(result))
     except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        return jsonify(fail(e)), 500
 
 
 @app.route('/api/media/<message_id>')
-def api_media(message_id):
+async def api_media(message_id):
     """Download media from a message"""
+    body = MediaBody()
     try:
-        # Use longer timeout for media downloads (videos can be large)
-        result = run_async(rpc_client.media(message_id), timeout=120)
-        return jsonify({"success": True, "data": result})
+        result = await rpc_client.media(message_id, sink=body)
     except Exception as e:
-        logger.error(f"Media download failed for {message_id}: {e}")
-        return jsonify({"success": False, "error": str(e)}), 404
+        logger.error("Media download failed for %s: %s", message_id, e)
+        return jsonify(fail(e)), 404
+
+    # The receive loop only hands over a view of the frame, the copy to the spool happens here
+    media_file = await asyncio.to_thread(spool_media, body.data)
+    body.data = None
+    response = Response(iter_file(media_file), mimetype=result.get("mime_type") or 'application/octet-stream')
+    response.content_length = result.get("size")
+    return response
 
 
 @app.route('/api/groups')
-def api_groups():
+async def api_groups():
     """Get all groups"""
     try:
-        result = run_async(rpc_client.groups())
-        return jsonify({"success": True, "data": result})
+        result = await rpc_client.groups()
+        return jsonify(ok(result))
     except Exception as e:
-        logger.error(f"Failed to get groups: {e}")
-        return jsonify({"success": False, "error": str(e)}), 500
+        logger.error("Failed to get groups: %s", e)
+        return jsonify(fail(e)), 500
 
 
 @app.route('/api/groups/<path:group_id>')
-def api_group_info(group_id):
+async def api_group_info(group_id):
     """Get group info"""
     try:
-        result = run_async(rpc_client.group_info(group_id))
-        return jsonify({"success": True, "data": result})
+        result = await rpc_client.group_info(group_id)
+        return jsonify(ok(result))
     except Exception as e:
-        logger.error(f"Failed to get group info for {group_id}: {e}")
-        return jsonify({"success": False, "error": str(e)}), 500
+        logger.error("Failed to get group info for %s: %s", group_id, e)
+        return jsonify(fail(e)), 500
 
 
 @app.route('/api/groups/update', methods=['POST'])
-def api_group_update():
+async def api_group_update():
     """Update group name/topic"""
-    data = request.json
+    data = await request.get_json()
     if not data or 'group_id' not in data:
-        return jsonify({"success": False, "error": "group_id required"}), 400
+        return jsonify(fail("group_id required")), 400
 
     try:
-        result = run_async(rpc_client.group_update(
+        result = await rpc_client.group_update(
             group_id=data['group_id'],
             name=data.get('name'),
             topic=data.get('topic')
-        ))
-        return jsonify({"success": True, "data": result})
+        )
+        return jsonify(ok(result))
     except Exception as e:
-        logger.error(f"Failed to update group {data.get('group_id')}: {e}")
-        return jsonify({"success": False, "error": str(e)}), 500
+        logger.error("Failed to update group %s: %s", data.get('group_id'), e)
+        return jsonify(fail(e)), 500
 
 
 # ============================================================================
@@ -295,51 +647,53 @@ def api_group_update():
 # ============================================================================
 
 @app.route('/api/rate-limit')
-def api_rate_limit_get():
+async def api_rate_limit_get():
     """Get rate limit configuration and stats"""
     try:
-        result = run_async(rpc_client.rate_limit_get())
-        return jsonify({"success": True, "data": result})
+        result = await get_rate_limit_config()
+        return jsonify(ok(result))
     except Exception as e:
-        logger.error(f"Failed to get rate limit config: {e}")
-        return jsonify({"success": False, "error": str(e)}), 500
+        logger.error("Failed to get rate limit config: %s", e)
+        return jsonify(fail(e)), 500
 
 
 @app.route('/api/rate-limit', methods=['POST'])
-def api_rate_limit_set():
+async def api_rate_limit_set():
     """Update rate limit configuration"""
-    data = request.json
+    data = await request.get_json()
     if not data:
-        return jsonify({"success": False, "error": "Configuration data required"}), 400
+        return jsonify(fail("Configuration data required")), 400
 
     try:
-        result = run_async(rpc_client.rate_limit_set(**data))
-        return jsonify({"success": True, "data": result})
+        result = await rpc_client.rate_limit_set(**data)
+        invalidate_rate_limit_cache()
+        return jsonify(ok(result))
     except Exception as e:
-        logger.error(f"Failed to update rate limit config: {e}")
-        return jsonify({"success": False, "error": str(e)}), 500
+        logger.error("Failed to update rate limit config: %s", e)
+        return jsonify(fail(e)), 500
 
 
 @app.route('/api/rate-limit/stats')
-def api_rate_limit_stats():
+async def api_rate_limit_stats():
     """Get rate limiting statistics"""
     try:
-        result = run_async(rpc_client.rate_limit_stats())
-        return jsonify({"success": True, "data": result})
+        result = await get_rate_limit_stats()
+        return jsonify(ok(result))
     except Exception as e:
-        logger.error(f"Failed to get rate limit stats: {e}")
-        return jsonify({"success": False, "error": str(e)}), 500
+        logger.error("Failed to get rate limit stats: %s", e)
+        return jsonify(fail(e)), 500
 
 
 @app.route('/api/rate-limit/unpause', methods=['POST'])
-def api_rate_limit_unpause():
+async def api_rate_limit_unpause():
     """Unpause rate limiting"""
     try:
-        result = run_async(rpc_client.rate_limit_unpause())
-        return jsonify({"success": True, "data": result})
+        result = await rpc_client.rate_limit_unpause()
+        invalidate_rate_limit_cache()
+        return jsonify(ok(result))
     except Exception as e:
-        logger.error(f"Failed to unpause rate limiting: {e}")
-        return jsonify({"success": False, "error": str(e)}), 500
+        logger.error("Failed to unpause rate limiting: %s", e)
+        return jsonify(fail(e)), 500
 
 
 # ============================================================================
@@ -347,239 +701,222 @@ def api_rate_limit_unpause():
 # ============================================================================
 
 @app.route('/send')
-def send_page():
+async def send_page():
     """Send message page"""
-    return render_template('send.html')
+    return await render_template('send.html')
 
 
 @app.route('/send', methods=['POST'])
-@limiter.limit(RATE_LIMIT_PER_USER, key_func=get_recipient_key)
-def send_message():
+@recipient_rate_limit(PER_USER_LIMIT)
+async def send_message():
     """Handle message sending from form"""
-    phone = request.form.get('phone')
-    message = request.form.get('message')
+    form = await request.form
+    phone = form.get('phone')
+    message = form.get('message')
 
     if not phone or not message:
-        flash('Phone number and message are required', 'error')
+        await flash('Phone number and message are required', 'error')
         return redirect(url_for('send_page'))
 
-    apply_message_delay()
-
     try:
-        run_async(rpc_client.send(phone=phone, message=message, type='text'))
-        flash(f'Message sent to {phone}!', 'success')
+        await rpc_client.send(phone=phone, message=message, type='text')
+        await flash(f'Message sent to {phone}!', 'success')
     except Exception as e:
-        flash(f'Failed to send message: {str(e)}', 'error')
+        await flash(f'Failed to send message: {str(e)}', 'error')
 
     return redirect(url_for('send_page'))
 
 
 @app.route('/messaging')
-def messaging_page():
+async def messaging_page():
     """Enhanced messaging page"""
-    return render_template('messaging.html')
+    return await render_template('messaging.html')
 
 
 @app.route('/messages')
-def messages_page():
+async def messages_page():
     """Messages viewing page"""
-    return render_template('messages.html')
+    return await render_template('messages.html')
 
 
 @app.route('/groups')
-def groups_page():
+async def groups_page():
     """Groups management page"""
-    return render_template('groups.html')
+    return await render_template('groups.html')
 
 
 @app.route('/contacts')
-def contacts_page():
+async def contacts_page():
     """Contacts management page"""
-    return render_template('contacts.html')
+    return await render_template('contacts.html')
 
 
 @app.route('/settings')
-def settings_page():
+async def settings_page():
     """Rate limiting and settings page"""
-    return render_template('settings.html')
+    return await render_template('settings.html')
 
 
 @app.route('/qr/<filename>')
-def serve_qr_file(filename):
+async def serve_qr_file(filename):
     """Serve QR PNG files from project root"""
     if filename.startswith('qr_') and filename.endswith('.png'):
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(current_dir)
-        file_path = os.path.join(project_root, filename)
-
-        if os.path.exists(file_path):
-            return send_from_directory(project_root, filename, mimetype='image/png')
-        else:
-            return jsonify({"success": False, "error": "File not found"}), 404
-    return jsonify({"success": False, "error": "Invalid filename"}), 400
+        try:
+            return await send_from_directory(PROJECT_ROOT, filename, mimetype='image/png')
+        except NotFound:
+            return jsonify(fail("File not found")), 404
+    return jsonify(fail("Invalid filename")), 400
 
 
 # ============================================================================
-# WebSocket Events (Flask-SocketIO for browser clients)
+# WebSocket Events (python-socketio for browser clients)
 # ============================================================================
 
+# Payload schemas, validated with msgspec.convert(); unknown fields are ignored
+NonEmptyStr = Annotated[str, msgspec.Meta(min_length=1)]
+NonEmptyList = Annotated[list[str], msgspec.Meta(min_length=1)]
+
+
+class ContactCheckReq(msgspec.Struct):
+    phones: NonEmptyList
+
+
+class ProfilePicReq(msgspec.Struct):
+    jid: NonEmptyStr
+    preview: bool = False
+
+
+class TypingReq(msgspec.Struct):
+    jid: NonEmptyStr
+    state: str = 'composing'
+    media: str = ''
+
+
+class PresenceReq(msgspec.Struct):
+    status: NonEmptyStr
+
+
+class MarkReadReq(msgspec.Struct):
+    message_ids: NonEmptyList
+    chat_jid: NonEmptyStr
+    sender_jid: Optional[str] = None
+
+
 @socketio_app.on('connect')
-def handle_connect():
+async def handle_connect(sid, environ):
     logger.info('Browser client connected')
     try:
-        status = run_async(rpc_client.status())
-        emit('status_update', {"success": True, "data": status})
+        status = await get_status()
+        queue_reply(sid, 'status_update', ok(status))
     except Exception as e:
-        emit('status_update', {"success": False, "error": str(e)})
+        queue_reply(sid, 'status_update', fail(e))
 
 
 @socketio_app.on('disconnect')
-def handle_disconnect():
+async def handle_disconnect(sid):
     logger.info('Browser client disconnected')
+    pending_replies.pop(sid, None)
 
 
 @socketio_app.on('request_status')
-def handle_status_request():
+async def handle_status_request(sid):
     try:
-        status = run_async(rpc_client.status())
-        emit('status_update', {"success": True, "data": status})
+        status = await get_status()
+        queue_reply(sid, 'status_update', ok(status))
     except Exception as e:
-        emit('status_update', {"success": False, "error": str(e)})
+        queue_reply(sid, 'status_update', fail(e))
 
 
 @socketio_app.on('subscribe_messages')
-def handle_subscribe_messages():
+async def handle_subscribe_messages(sid):
     """Client subscribes to receive all WhatsApp events"""
     logger.info('Client subscribed to messages')
-    emit('subscribed', {'success': True})
+    queue_reply(sid, 'subscribed', ok())
 
 
 @socketio_app.on('contact_check')
-def handle_contact_check(data):
+@rpc_handler('contact_check_result', "check contacts", "phones array required")
+async def handle_contact_check(sid, data):
     """Check if phone numbers are registered on WhatsApp"""
-    phones = data.get('phones', [])
-    if not phones:
-        emit('contact_check_result', {"success": False, "error": "phones array required"})
-        return
-    try:
-        result = run_async(rpc_client.contact_check(phones))
-        emit('contact_check_result', {"success": True, "data": result})
-    except Exception as e:
-        logger.error(f"Failed to check contacts: {e}")
-        emit('contact_check_result', {"success": False, "error": str(e)})
+    req = msgspec.convert(data, ContactCheckReq)
+    result = await batched_contact_check(req.phones)
+    queue_reply(sid, 'contact_check_result', ok(result))
 
 
 @socketio_app.on('contact_profile_pic')
-def handle_contact_profile_pic(data):
+@rpc_handler('contact_profile_pic_result', "get profile picture", "jid required")
+async def handle_contact_profile_pic(sid, data):
     """Get profile picture for a user or group"""
-    jid = data.get('jid')
-    if not jid:
-        emit('contact_profile_pic_result', {"success": False, "error": "jid required"})
-        return
-    try:
-        result = run_async(rpc_client.contact_profile_pic(jid, data.get('preview', False)))
-        emit('contact_profile_pic_result', {"success": True, "data": result, "jid": jid})
-    except Exception as e:
-        logger.error(f"Failed to get profile picture: {e}")
-        emit('contact_profile_pic_result', {"success": False, "error": str(e), "jid": jid})
+    req = msgspec.convert(data, ProfilePicReq)
+    result = await rpc_contact_profile_pic(req.jid, req.preview)
+    queue_reply(sid, 'contact_profile_pic_result', ok(result, jid=req.jid))
 
 
 @socketio_app.on('typing')
-def handle_typing(data):
+@rpc_handler('typing_result', "send typing indicator", "jid required")
+async def handle_typing(sid, data):
     """Send typing indicator to a chat"""
-    jid = data.get('jid')
-    if not jid:
-        emit('typing_result', {"success": False, "error": "jid required"})
-        return
-    try:
-        result = run_async(rpc_client.typing(
-            jid=jid,
-            state=data.get('state', 'composing'),
-            media=data.get('media', '')
-        ))
-        emit('typing_result', {"success": True, "data": result})
-    except Exception as e:
-        logger.error(f"Failed to send typing indicator: {e}")
-        emit('typing_result', {"success": False, "error": str(e)})
+    req = msgspec.convert(data, TypingReq)
+    # wait for the reply rather than sending a notification, so backend failures reach the UI
+    await rpc_typing(req.jid, req.state, req.media, wait=True)
+    queue_reply(sid, 'typing_result', ok())
 
 
 @socketio_app.on('presence')
-def handle_presence(data):
+@rpc_handler('presence_result', "set presence", "status required")
+async def handle_presence(sid, data):
     """Set online/offline presence status"""
-    status = data.get('status')
-    if not status:
-        emit('presence_result', {"success": False, "error": "status required"})
-        return
-    try:
-        result = run_async(rpc_client.presence(status))
-        emit('presence_result', {"success": True, "data": result})
-    except Exception as e:
-        logger.error(f"Failed to set presence: {e}")
-        emit('presence_result', {"success": False, "error": str(e)})
+    req = msgspec.convert(data, PresenceReq)
+    # wait for the reply rather than sending a notification, so backend failures reach the UI
+    await rpc_presence(req.status, wait=True)
+    queue_reply(sid, 'presence_result', ok())
 
 
 @socketio_app.on('mark_read')
-def handle_mark_read(data):
+@rpc_handler('mark_read_result', "mark messages as read", "message_ids and chat_jid required")
+async def handle_mark_read(sid, data):
     """Mark messages as read"""
-    message_ids = data.get('message_ids', [])
-    chat_jid = data.get('chat_jid')
-    if not message_ids or not chat_jid:
-        emit('mark_read_result', {"success": False, "error": "message_ids and chat_jid required"})
-        return
-    try:
-        result = run_async(rpc_client.mark_read(
-            message_ids=message_ids,
-            chat_jid=chat_jid,
-            sender_jid=data.get('sender_jid')
-        ))
-        emit('mark_read_result', {"success": True, "data": result})
-    except Exception as e:
-        logger.error(f"Failed to mark messages as read: {e}")
-        emit('mark_read_result', {"success": False, "error": str(e)})
+    req = msgspec.convert(data, MarkReadReq)
+    result = await rpc_mark_read(
+        message_ids=req.message_ids,
+        chat_jid=req.chat_jid,
+        sender_jid=req.sender_jid
+    )
+    queue_reply(sid, 'mark_read_result', ok(result))
 
 
 @socketio_app.on('rate_limit_get')
-def handle_rate_limit_get():
+@rpc_handler('rate_limit_result', "get rate limit config")
+async def handle_rate_limit_get(sid):
     """Get rate limit configuration and stats"""
-    try:
-        result = run_async(rpc_client.rate_limit_get())
-        emit('rate_limit_result', {"success": True, "data": result})
-    except Exception as e:
-        logger.error(f"Failed to get rate limit config: {e}")
-        emit('rate_limit_result', {"success": False, "error": str(e)})
+    result = await get_rate_limit_config()
+    queue_reply(sid, 'rate_limit_result', ok(result))
 
 
 @socketio_app.on('rate_limit_set')
-def handle_rate_limit_set(data):
+@rpc_handler('rate_limit_result', "update rate limit config")
+async def handle_rate_limit_set(sid, data):
     """Update rate limit configuration"""
-    try:
-        result = run_async(rpc_client.rate_limit_set(**data))
-        emit('rate_limit_result', {"success": True, "data": result})
-    except Exception as e:
-        logger.error(f"Failed to update rate limit config: {e}")
-        emit('rate_limit_result', {"success": False, "error": str(e)})
+    result = await rpc_rate_limit_set(**data)
+    invalidate_rate_limit_cache()
+    queue_reply(sid, 'rate_limit_result', ok(result))
 
 
 @socketio_app.on('rate_limit_stats')
-def handle_rate_limit_stats():
+@rpc_handler('rate_limit_stats_result', "get rate limit stats")
+async def handle_rate_limit_stats(sid):
     """Get rate limiting statistics"""
-    try:
-        result = run_async(rpc_client.rate_limit_stats())
-        emit('rate_limit_stats_result', {"success": True, "data": result})
-    except Exception as e:
-        logger.error(f"Failed to get rate limit stats: {e}")
-        emit('rate_limit_stats_result', {"success": False, "error": str(e)})
+    result = await get_rate_limit_stats()
+    queue_reply(sid, 'rate_limit_stats_result', ok(result))
 
 
 @socketio_app.on('rate_limit_unpause')
-def handle_rate_limit_unpause():
+@rpc_handler('rate_limit_result', "unpause rate limiting")
+async def handle_rate_limit_unpause(sid):
     """Unpause rate limiting"""
-    try:
-        result = run_async(rpc_client.rate_limit_unpause())
-        emit('rate_limit_result', {"success": True, "data": result})
-    except Exception as e:
-        logger.error(f"Failed to unpause rate limiting: {e}")
-        emit('rate_limit_result', {"success": False, "error": str(e)})
+    result = await rpc_rate_limit_unpause()
+    invalidate_rate_limit_cache()
+    queue_reply(sid, 'rate_limit_result', ok(result))
 
 
 # ============================================================================
@@ -588,7 +925,8 @@ def handle_rate_limit_unpause():
 
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
-    debug = os.getenv('FLASK_ENV') == 'development'
+    # FLASK_ENV=development still works for setups from before the move to Quart
+    debug = os.getenv('WEB_DEBUG', 'false').lower() == 'true' or os.getenv('FLASK_ENV') == 'development'
 
     if debug:
         logging.getLogger().setLevel(logging.DEBUG)
@@ -596,14 +934,12 @@ if __name__ == '__main__':
     print(f"Starting WhatsApp Web UI (WebSocket RPC) on port {port}")
     print(f"Go WebSocket RPC URL: {GO_WS_RPC_URL}")
 
-    # Initialize RPC client
-    print("Connecting to Go backend via WebSocket RPC...")
-    init_rpc_client()
-    time.sleep(2)  # Give RPC client time to connect
-
     # Print routes
-    print("Registered routes:")
-    for rule in app.url_map.iter_rules():
-        print(f"  {rule.rule} - {rule.methods}")
-
-    socketio_app.run(app, host='0.0.0.0', port=port, debug=debug, allow_unsafe_werkzeug=True)
+    sys.stdout.write("Registered routes:\n" + "".join(
+        f"  {rule.rule} - {rule.methods}\n" for rule in app.url_map.iter_rules()
+    ))
+
+    # RPC client connects in init_rpc_client() once the server loop is running.
+    # Uvicorn's defaults (loop/http="auto") run on uvloop and httptools whenever they are installed.
+    app.debug = debug
+    uvicorn.run(asgi_app, host='0.0.0.0', port=port, log_level='debug' if debug else 'info')